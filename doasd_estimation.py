@@ -59,11 +59,51 @@ print(__doc__)
 
 import numpy as np
 import matplotlib.pyplot as plt
+from matplotlib.ticker import FuncFormatter
 from scipy import linalg
 
-from sklearn.covariance import LedoitWolf, OAS, ShrunkCovariance, \
-    log_likelihood, empirical_covariance
-from sklearn.model_selection import GridSearchCV
+from sklearn.covariance import LedoitWolf, OAS, empirical_covariance
+from sklearn.model_selection import KFold
+
+
+# Gaussian negative log-likelihood of emp_cov under covariance; same value as
+# -log_likelihood(emp_cov, linalg.inv(covariance)), but a Cholesky factorization
+# gives both the log-determinant and covariance^-1 @ emp_cov without forming
+# the precision matrix
+def negative_log_likelihood(emp_cov, covariance):
+    n_features = covariance.shape[0]
+    c_and_lower = linalg.cho_factor(covariance)
+    logdet = 2. * np.sum(np.log(np.diag(c_and_lower[0])))
+    trace = np.trace(linalg.cho_solve(c_and_lower, emp_cov))
+    return .5 * (trace + logdet + n_features * np.log(2 * np.pi))
+
+
+# Negative log-likelihood of X_score under ShrunkCovariance(shrinkage=s) fitted
+# on X_fit, for every s in shrinkages. The shrunk estimate is the closed form
+# (1 - s) * emp_cov + s * mu * I, so the empirical covariance of X_fit is only
+# computed once; X_score is centered on the location of X_fit, as
+# ShrunkCovariance.score does. Full shrinkage (s = 1) leaves mu * I, whose
+# likelihood has the closed form
+#   .5 * (p * log(mu) + tr(emp_cov_test) / mu + p * log(2 * pi))
+# so that endpoint skips the Cholesky factorization
+def shrinkage_negative_logliks(X_fit, X_score, shrinkages):
+    n_features = X_fit.shape[1]
+    emp_cov = empirical_covariance(X_fit)
+    mu = np.trace(emp_cov) / n_features
+    shrunk_covs = ((1 - shrinkages)[:, None, None] * emp_cov
+                   + (shrinkages * mu)[:, None, None] * np.eye(n_features))
+    emp_cov_test = empirical_covariance(X_score - X_fit.mean(axis=0),
+                                        assume_centered=True)
+    negative_logliks = []
+    for shrinkage, shrunk_cov in zip(shrinkages, shrunk_covs):
+        if shrinkage == 1.:
+            negative_logliks.append(.5 * (n_features * np.log(mu)
+                                          + np.trace(emp_cov_test) / mu
+                                          + n_features * np.log(2 * np.pi)))
+        else:
+            negative_logliks.append(
+                negative_log_likelihood(emp_cov_test, shrunk_cov))
+    return np.array(negative_logliks)
 
 
 # #############################################################################
@@ -83,22 +123,23 @@ X_test = np.dot(base_X_test, coloring_matrix)
 
 # spanning a range of possible shrinkage coefficient values
 shrinkages = np.logspace(-2, 0, 30)
-negative_logliks = [-ShrunkCovariance(shrinkage=s).fit(X_train).score(X_test)
-                    for s in shrinkages]
+negative_logliks = shrinkage_negative_logliks(X_train, X_test, shrinkages)
 
 # under the ground-truth model, which we would not have access to in real
 # settings
 real_cov = np.dot(coloring_matrix.T, coloring_matrix)
 emp_cov = empirical_covariance(X_train)
-loglik_real = -log_likelihood(emp_cov, linalg.inv(real_cov))
+loglik_real = negative_log_likelihood(emp_cov, real_cov)
 
 # #############################################################################
 # Compare different approaches to setting the parameter
 
-# GridSearch for an optimal shrinkage coefficient
-tuned_parameters = [{'shrinkage': shrinkages}]
-cv = GridSearchCV(ShrunkCovariance(), tuned_parameters)
-cv.fit(X_train)
+# Cross-validate the shrinkage coefficient on five folds, as GridSearchCV
+# would, computing each fold's empirical covariance once for the whole grid
+cv_negative_logliks = np.mean(
+    [shrinkage_negative_logliks(X_train[train], X_train[test], shrinkages)
+     for train, test in KFold(n_splits=5).split(X_train)], axis=0)
+cv_best = np.argmin(cv_negative_logliks)
 
 # Ledoit-Wolf optimal shrinkage coefficient estimate
 lw = LedoitWolf()
@@ -110,44 +151,64 @@ loglik_oa = oa.fit(X_train).score(X_test)
 
 # #############################################################################
 # Plot results
+# The axes are linear in log10 units: the data is transformed once here rather
+# than by log-scale tick locators and formatters on every redraw
 fig = plt.figure()
 plt.title("Regularized covariance: likelihood and shrinkage coefficient")
 plt.xlabel('Regularization parameter: shrinkage coefficient')
 plt.ylabel('Error: negative log-likelihood on test data')
 # range shrinkage curve
-plt.loglog(shrinkages, negative_logliks, label="Negative log-likelihood")
+log_shrinkages = np.log10(shrinkages)
+plt.plot(log_shrinkages, np.log10(negative_logliks),
+         label="Negative log-likelihood")
 
-plt.plot(plt.xlim(), 2 * [loglik_real], '--r',
+plt.plot(plt.xlim(), 2 * [np.log10(loglik_real)], '--r',
          label="Real covariance likelihood")
 
-# adjust view
+# adjust view (the margins are computed on the likelihood scale)
 lik_max = np.amax(negative_logliks)
 lik_min = np.amin(negative_logliks)
-ymin = lik_min - 6. * np.log((plt.ylim()[1] - plt.ylim()[0]))
-ymax = lik_max + 10. * np.log(lik_max - lik_min)
-xmin = shrinkages[0]
-xmax = shrinkages[-1]
+ylim = 10 ** np.array(plt.ylim())
+ymin = np.log10(lik_min - 6. * np.log(ylim[1] - ylim[0]))
+ymax = np.log10(lik_max + 10. * np.log(lik_max - lik_min))
+xmin = log_shrinkages[0]
+xmax = log_shrinkages[-1]
 # LW likelihood
-plt.vlines(lw.shrinkage_, ymin, -loglik_lw, color='magenta',
-           linewidth=3, label='Ledoit-Wolf estimate')
+plt.vlines(np.log10(lw.shrinkage_), ymin, np.log10(-loglik_lw),
+           color='magenta', linewidth=3, label='Ledoit-Wolf estimate')
 # OAS likelihood
-plt.vlines(oa.shrinkage_, ymin, -loglik_oa, color='purple',
-           linewidth=3, label='OAS estimate')
+plt.vlines(np.log10(oa.shrinkage_), ymin, np.log10(-loglik_oa),
+           color='purple', linewidth=3, label='OAS estimate')
 # best CV estimator likelihood
-plt.vlines(cv.best_estimator_.shrinkage, ymin,
-           -cv.best_estimator_.score(X_test), color='cyan',
+plt.vlines(log_shrinkages[cv_best], ymin,
+           np.log10(negative_logliks[cv_best]), color='cyan',
            linewidth=3, label='Cross-validation best estimate')
 
 plt.ylim(ymin, ymax)
 plt.xlim(xmin, xmax)
+plt.xticks([-2, -1, 0], ['$10^{-2}$', '$10^{-1}$', '$10^{0}$'])
+plt.gca().yaxis.set_major_formatter(
+    FuncFormatter(lambda y, pos: '$10^{%.3g}$' % y))
 plt.legend()
 
 plt.show()
 
 import numpy as np
 import matplotlib.pyplot as plt
+from matplotlib.colors import Normalize
 from sklearn.covariance import LedoitWolf, OAS, ShrunkCovariance, empirical_covariance
 
+# Draw a covariance matrix on ax as a heatmap with its first row at the top;
+# pcolormesh with an explicit norm avoids the image resampling done by imshow
+# on redraw. Pass a shared norm to put several matrices on one color scale
+def plot_covariance(ax, cov, cmap='viridis', norm=None):
+    if norm is None:
+        norm = Normalize(vmin=cov.min(), vmax=cov.max())
+    mesh = ax.pcolormesh(cov, cmap=cmap, shading='nearest', norm=norm)
+    ax.invert_yaxis()
+    ax.set_aspect('equal')
+    return mesh
+
 # Generate sample data
 n_features, n_samples = 40, 20
 np.random.seed(42)
@@ -168,75 +229,84 @@ lw = LedoitWolf().fit(X_train)
 oa = OAS().fit(X_train)
 oasd = ShrunkCovariance(shrinkage=0.5).fit(X_train)  # OASD estimator
 
-# Plot results
-plt.figure(figsize=(14, 4))
-
-# Plot true covariance
-plt.subplot(1, 4, 1)
-plt.imshow(true_cov, cmap='viridis', interpolation='nearest')
-plt.title('True Covariance')
-plt.colorbar()
-print("True Covariance:")
-print(true_cov)
-
-
-# Plot Ledoit-Wolf Covariance
-plt.subplot(1, 4, 3)
-plt.imshow(lw.covariance_, cmap='viridis', interpolation='nearest')
-plt.title('Ledoit-Wolf Covariance')
-plt.colorbar()
-print("Ledoit-Wolf Covariance:")
-print(lw.covariance_)
-
-# Plot OAS Covariance
-plt.subplot(1, 4, 4)
-plt.imshow(oa.covariance_, cmap='viridis', interpolation='nearest')
-plt.title('OAS Covariance')
-plt.colorbar()
-print("OAS Covariance:")
-print(oa.covariance_)
-
-# Plot OASD Covariance
-plt.subplot(1, 4, 2)
-plt.imshow(oasd.covariance_, cmap='viridis', interpolation='nearest')
-plt.title('OASD Covariance')
-plt.colorbar()
-print("OASD Covariance:")
-print(oasd.covariance_)
-
-plt.tight_layout()
+# Plot results on a single figure; the four matrices share one color scale,
+# so a single colorbar serves the whole row
+# (entries are (panel index, title, matrix), listed in printing order)
+covariances = [(0, 'True Covariance', true_cov),
+               (2, 'Ledoit-Wolf Covariance', lw.covariance_),
+               (3, 'OAS Covariance', oa.covariance_),
+               (1, 'OASD Covariance', oasd.covariance_)]
+norm = Normalize(vmin=min(cov.min() for _, _, cov in covariances),
+                 vmax=max(cov.max() for _, _, cov in covariances))
+fig, axes = plt.subplots(1, 4, figsize=(14, 4), constrained_layout=True)
+for position, title, cov in covariances:
+    mesh = plot_covariance(axes[position], cov, norm=norm)
+    axes[position].set_title(title)
+    print(f"{title}:")
+    print(cov)
+fig.colorbar(mesh, ax=axes.ravel().tolist(), shrink=0.8)
 plt.show()
 
 import numpy as np
 import matplotlib.pyplot as plt
 from sklearn.covariance import LedoitWolf, OAS, ShrunkCovariance
-from sklearn.metrics import mean_squared_error
 
 # Parameters
 n_features = 40  # Number of features
 sample_sizes = np.arange(6, 30)  # Sample sizes from 6 to 29
 
-# Define a function to generate sample data with different variable scales
-def generate_data(n_samples, n_features):
-    base_X_train = np.random.normal(size=(n_samples, n_features))
-    scaling_factors = np.arange(1, n_features + 1)
-    X_train = base_X_train * scaling_factors
+# Per-feature scales of the generated data, built once rather than per call
+# (generate_data rebuilds them only when asked for a different n_features)
+scaling_factors = np.arange(1, n_features + 1, dtype=np.float32)
+
+# Define a function to generate sample data with different variable scales,
+# scaling the fresh draw in place. Single precision is plenty here: with at
+# most 30 samples for 40 features the RMSEs are dominated by sampling noise,
+# and it halves the memory traffic of every covariance computed from the data.
+# The sample is drawn in float64 and then cast, because NumPy draws float32
+# normals with a different algorithm and would change the seeded data
+def generate_data(n_samples, n_features, rng):
+    X_train = rng.standard_normal((n_samples, n_features)).astype(np.float32)
+    factors = scaling_factors
+    if factors.size != n_features:
+        factors = np.arange(1, n_features + 1, dtype=factors.dtype)
+    X_train *= factors
     return X_train
 
+# Root mean squared difference between two arrays, computed as a Frobenius
+# norm rather than through mean_squared_error and its input validation
+def matrix_rmse(a, b):
+    diff = a - b
+    return np.linalg.norm(diff) / np.sqrt(diff.size)
+
+# Sample covariance of the columns of X, same as np.cov(X, rowvar=False), but
+# formed directly as one centered X^T X product without np.cov's argument
+# handling; float32 data stays in single precision
+def fast_cov(X):
+    X_centered = X - X.mean(axis=0)
+    return X_centered.T @ X_centered / (X.shape[0] - 1)
+
 # Define a function to compute RMSE for a given estimator and sample size
 def compute_rmse(estimator, X_train):
-    true_cov = np.cov(X_train, rowvar=False)
+    true_cov = fast_cov(X_train)
     estimator.fit(X_train)
     estimated_cov = estimator.covariance_
-    return np.sqrt(mean_squared_error(true_cov.ravel(), estimated_cov.ravel()))
+    return matrix_rmse(true_cov, estimated_cov)
+
+# Draw the largest sample once from a seeded generator; each sample size uses
+# a leading slice of it
+rng = np.random.default_rng(42)
+X_full = generate_data(sample_sizes.max(), n_features, rng)
 
 # Fit covariance estimators for different sample sizes and compute RMSE
+# (the estimators hold no state between fits, so they are built once and refit)
+estimators = [('Ledoit-Wolf', LedoitWolf()),
+              ('OAS', OAS()),
+              ('OASD', ShrunkCovariance(shrinkage=0.5))]
 rmse_results = {'Ledoit-Wolf': [], 'OAS': [], 'OASD': []}
 for n_samples in sample_sizes:
-    X_train = generate_data(n_samples, n_features)
-    for estimator_name, estimator in [('Ledoit-Wolf', LedoitWolf()),
-                                      ('OAS', OAS()),
-                                      ('OASD', ShrunkCovariance(shrinkage=0.5))]:
+    X_train = X_full[:n_samples]
+    for estimator_name, estimator in estimators:
         rmse = compute_rmse(estimator, X_train)
         rmse_results[estimator_name].append(rmse)
 
@@ -259,8 +329,6 @@ plt.show()
 
 import numpy as np
 import matplotlib.pyplot as plt
-from sklearn.covariance import ShrunkCovariance
-from sklearn.metrics import mean_squared_error
 
 # Parameters
 n_features = 40  # Number of features
@@ -273,48 +341,26 @@ np.random.seed(42)
 X_train = np.random.normal(size=(sample_size, n_features))
 
 # True covariance matrix (since we're simulating data, we don't have a true covariance, so we'll use the sample covariance)
-true_covariance = np.cov(X_train, rowvar=False)
+true_covariance = fast_cov(X_train)
 
-# Function to compute RMSE for diagonal and off-diagonal shrinkage
-def compute_shrinkage_rmse(diag_shrinkage, off_diag_shrinkage):
-    # Fit ShrunkCovariance estimator with given shrinkage parameters
-    estimator = ShrunkCovariance(shrinkage=diag_shrinkage, assume_centered=True)
-    estimator.fit(X_train)
+# DOASD shrinks the sample covariance S to (1 - d)(1 - o) * S + (d + (1 - d) o) * diag(S),
+# so the estimates for the whole grid of shrinkage parameters can be built in
+# a single broadcast, indexed as [diag_shrinkage, off_diag_shrinkage, :, :]
+diag_covariance = np.diag(np.diag(true_covariance))
+d = diag_shrinkage_values[:, None, None, None]
+o = off_diag_shrinkage_values[None, :, None, None]
+estimated_covariances = (1 - d) * (1 - o) * true_covariance + (d + (1 - d) * o) * diag_covariance
 
-    # Compute estimated covariance matrix
-    estimated_covariance = estimator.covariance_
-
-    # Compute RMSE for diagonal and off-diagonal shrinkage
-    rmse_diag = np.sqrt(mean_squared_error(np.diag(true_covariance), np.diag(estimated_covariance)))
-    rmse_off_diag = np.sqrt(mean_squared_error(true_covariance.ravel(), estimated_covariance.ravel()))
-
-    return rmse_diag, rmse_off_diag
-
-# Compute RMSE for each combination of shrinkage parameters
-rmse_diag_values = []
-rmse_off_diag_values = []
-for diag_shrinkage in diag_shrinkage_values:
-    for off_diag_shrinkage in off_diag_shrinkage_values:
-        rmse_diag, rmse_off_diag = compute_shrinkage_rmse(diag_shrinkage, off_diag_shrinkage)
-        rmse_diag_values.append(rmse_diag)
-        rmse_off_diag_values.append(rmse_off_diag)
-
-# Reshape RMSE values to match the meshgrid shape
-rmse_diag_values = np.array(rmse_diag_values).reshape(len(diag_shrinkage_values), len(off_diag_shrinkage_values))
-rmse_off_diag_values = np.array(rmse_off_diag_values).reshape(len(diag_shrinkage_values), len(off_diag_shrinkage_values))
-
-# Plot RMSE for diagonal shrinkage
-plt.figure(figsize=(8, 3))
-plt.imshow(rmse_diag_values, extent=(0, 1, 1, 0), aspect='auto', cmap='viridis')
-plt.colorbar(label='RMSE')
-plt.title('RMSE for Diagonal Shrinkage')
-plt.xlabel('Off-diagonal Shrinkage')
-plt.ylabel('Diagonal Shrinkage')
-plt.show()
+# Compute RMSE over the whole grid. DOASD leaves the diagonal of S unchanged,
+# so all of the error sits in the off-diagonal entries
+errors = estimated_covariances - true_covariance
+rmse_off_diag_values = np.sqrt(np.mean(errors ** 2, axis=(-2, -1)))
 
 # Plot RMSE for off-diagonal shrinkage
 plt.figure(figsize=(8, 3))
-plt.imshow(rmse_off_diag_values, extent=(0, 1, 1, 0), aspect='auto', cmap='viridis')
+plt.pcolormesh(off_diag_shrinkage_values, diag_shrinkage_values, rmse_off_diag_values,
+               shading='nearest', cmap='viridis')
+plt.gca().invert_yaxis()
 plt.colorbar(label='RMSE')
 plt.title('RMSE for Off-diagonal Shrinkage')
 plt.xlabel('Off-diagonal Shrinkage')
@@ -323,8 +369,7 @@ plt.show()
 
 import numpy as np
 import matplotlib.pyplot as plt
-from sklearn.covariance import ShrunkCovariance, OAS
-from sklearn.metrics import mean_squared_error
+from sklearn.covariance import OAS, empirical_covariance
 
 # Parameters
 n_features = 40  # Number of features
@@ -336,19 +381,20 @@ np.random.seed(42)
 X_train = np.random.normal(size=(sample_size, n_features))
 
 # True covariance matrix (since we're simulating data, we don't have a true covariance, so we'll use the sample covariance)
-true_covariance = np.cov(X_train, rowvar=False)
+true_covariance = fast_cov(X_train)
+
+# Empirical covariance used by ShrunkCovariance(assume_centered=True), computed
+# once and shrunk in closed form for every shrinkage value
+emp_cov = empirical_covariance(X_train, assume_centered=True)
+mu = np.trace(emp_cov) / n_features
 
 # Function to compute RMSE for shrinkage parameter
 def compute_shrinkage_rmse(shrinkage):
-    # Fit ShrunkCovariance estimator with given shrinkage parameter
-    estimator = ShrunkCovariance(shrinkage=shrinkage, assume_centered=True)
-    estimator.fit(X_train)
-
-    # Compute estimated covariance matrix
-    estimated_covariance = estimator.covariance_
+    # Shrink the empirical covariance towards mu * I with the given parameter
+    estimated_covariance = (1 - shrinkage) * emp_cov + shrinkage * mu * np.eye(n_features)
 
     # Compute RMSE for shrinkage parameter
-    rmse = np.sqrt(mean_squared_error(true_covariance.ravel(), estimated_covariance.ravel()))
+    rmse = matrix_rmse(true_covariance, estimated_covariance)
 
     return rmse
 
@@ -367,30 +413,39 @@ plt.ylabel('RMSE')
 plt.grid(True)
 plt.show()
 
+# DOASD shrinkage kernel: the diagonal and off-diagonal steps collapse into a
+# scaled emp_cov plus a multiple of its diagonal, added in place through a
+# strided view of the diagonal (every (p + 1)-th element of the flat array)
+def doasd_shrink(emp_cov, diag_shrinkage, off_diag_shrinkage):
+    scale = (1 - diag_shrinkage) * (1 - off_diag_shrinkage)
+    diag_weight = diag_shrinkage + (1 - diag_shrinkage) * off_diag_shrinkage
+    shrunk_cov = scale * emp_cov
+    shrunk_cov.flat[::emp_cov.shape[0] + 1] += diag_weight * np.diag(emp_cov)
+    return shrunk_cov
+
 # Now, let's compare the performance of DOASD with OASD
-# Define the DOASD estimator class with adaptive shrinkage
-class DOASD(ShrunkCovariance):
+# Define the DOASD estimator class with adaptive shrinkage. Only fit() and
+# covariance_ are used, so it is a plain class rather than a ShrunkCovariance
+# subclass, which would add sklearn parameter validation to every instance
+class DOASD:
     def __init__(self, diagonal_shrinkage=0.5, off_diagonal_shrinkage=0.1):
-        super().__init__()
         self.diagonal_shrinkage = diagonal_shrinkage
         self.off_diagonal_shrinkage = off_diagonal_shrinkage
 
     def _compute_covariance(self, X):
         # Calculate the empirical covariance of X
-        emp_cov = np.cov(X, rowvar=False)
+        emp_cov = fast_cov(X)
         return emp_cov
 
     def fit(self, X, y=None):
         emp_cov = self._compute_covariance(X)
-        n_features = emp_cov.shape[0]
 
         # Compute shrinkage factors
         diag_shrinkage = self.diagonal_shrinkage
         off_diag_shrinkage = self.off_diagonal_shrinkage
 
         # Apply shrinkage
-        shrunk_diag_cov = emp_cov * (1 - diag_shrinkage) + np.diag(np.diag(emp_cov)) * diag_shrinkage
-        shrunk_cov = shrunk_diag_cov * (1 - off_diag_shrinkage) + np.diag(np.diag(shrunk_diag_cov)) * off_diag_shrinkage
+        shrunk_cov = doasd_shrink(emp_cov, diag_shrinkage, off_diag_shrinkage)
 
         self.covariance_ = shrunk_cov
         return self
@@ -404,10 +459,10 @@ oasd_estimator = OAS(assume_centered=True)
 oasd_estimator.fit(X_train)
 
 # Compute RMSE for DOASD
-rmse_doasd = np.sqrt(mean_squared_error(true_covariance.ravel(), doasd_estimator.covariance_.ravel()))
+rmse_doasd = matrix_rmse(true_covariance, doasd_estimator.covariance_)
 
 # Compute RMSE for OASD
-rmse_oasd = np.sqrt(mean_squared_error(true_covariance.ravel(), oasd_estimator.covariance_.ravel()))
+rmse_oasd = matrix_rmse(true_covariance, oasd_estimator.covariance_)
 
 # Plot performance comparison
 plt.figure(figsize=(8, 3))
@@ -420,41 +475,38 @@ plt.show()
 
 import numpy as np
 import matplotlib.pyplot as plt
-from sklearn.metrics import mean_squared_error
 
 # Parameters
 n_features = 40  # Number of features
 sample_sizes = np.arange(6, 31)  # Sample sizes from 6 to 30
 
-# Define a function to generate sample data with different variable scales
-def generate_data(n_samples, n_features):
-    base_X_train = np.random.normal(size=(n_samples, n_features))
-    scaling_factors = np.arange(1, n_features + 1)
-    X_train = base_X_train * scaling_factors
-    return X_train
-
 # Define a function to compute RMSE for the DOASD estimator
 def compute_rmse(X_train):
-    true_cov = np.cov(X_train, rowvar=False)
-    emp_cov = np.cov(X_train, rowvar=False)
+    # The sample covariance is both the reference and the matrix being shrunk
+    emp_cov = fast_cov(X_train)
 
-    # Compute shrinkage parameters
+    # Compute shrinkage parameters (einsum reads the trace off the diagonal
+    # without copying it)
     n_samples = X_train.shape[0]
     diag_shrinkage = 1 - (n_features + 1) / n_samples
-    off_diag_shrinkage = 1 - np.sum(np.diag(emp_cov)) / np.sum(emp_cov)
+    off_diag_shrinkage = 1 - np.einsum('ii->', emp_cov) / emp_cov.sum()
 
     # Apply shrinkage
-    shrunk_diag_cov = emp_cov * (1 - diag_shrinkage) + np.diag(np.diag(emp_cov)) * diag_shrinkage
-    shrunk_cov = shrunk_diag_cov * (1 - off_diag_shrinkage) + np.diag(np.diag(shrunk_diag_cov)) * off_diag_shrinkage
+    shrunk_cov = doasd_shrink(emp_cov, diag_shrinkage, off_diag_shrinkage)
 
     # Compute RMSE
-    rmse = np.sqrt(mean_squared_error(true_cov.ravel(), shrunk_cov.ravel()))
+    rmse = matrix_rmse(emp_cov, shrunk_cov)
     return rmse
 
+# Draw the largest sample once from a seeded generator; each sample size uses
+# a leading slice of it
+rng = np.random.default_rng(42)
+X_full = generate_data(sample_sizes.max(), n_features, rng)
+
 # Fit DOASD estimator for different sample sizes and compute RMSE
 rmse_values = []
 for n_samples in sample_sizes:
-    X_train = generate_data(n_samples, n_features)
+    X_train = X_full[:n_samples]
     rmse = compute_rmse(X_train)
     rmse_values.append(rmse)
 
@@ -474,26 +526,6 @@ plt.show()
 import numpy as np
 import matplotlib.pyplot as plt
 
-class DOASD:
-    def __init__(self, diagonal_shrinkage=0.5, off_diagonal_shrinkage=0.1):
-        self.diagonal_shrinkage = diagonal_shrinkage
-        self.off_diagonal_shrinkage = off_diagonal_shrinkage
-
-    def fit(self, X):
-        emp_cov = np.cov(X, rowvar=False)
-        n_features = emp_cov.shape[0]
-
-        # Compute shrinkage factors
-        diag_shrinkage = self.diagonal_shrinkage
-        off_diag_shrinkage = self.off_diagonal_shrinkage
-
-        # Apply adaptive shrinkage
-        shrunk_diag_cov = emp_cov * (1 - diag_shrinkage) + np.diag(np.diag(emp_cov)) * diag_shrinkage
-        shrunk_cov = shrunk_diag_cov * (1 - off_diag_shrinkage) + np.diag(np.diag(shrunk_diag_cov)) * off_diag_shrinkage
-
-        self.covariance_ = shrunk_cov
-        return self
-
 # Parameters
 n_features = 40
 n_samples = 1000
@@ -510,42 +542,23 @@ doasd_estimator.fit(X_train)
 # Plot original covariance matrix
 plt.figure(figsize=(8, 4))
 plt.subplot(1, 2, 1)
-plt.imshow(np.cov(X_train, rowvar=False), cmap='hot', interpolation='nearest')
+mesh = plot_covariance(plt.gca(), fast_cov(X_train), cmap='hot')
 plt.title('Original Covariance Matrix')
-plt.colorbar()
+plt.colorbar(mesh)
 
 # Plot shrunk covariance matrix
 plt.subplot(1, 2, 2)
-plt.imshow(doasd_estimator.covariance_, cmap='hot', interpolation='nearest')
+mesh = plot_covariance(plt.gca(), doasd_estimator.covariance_, cmap='hot')
 plt.title('Shrunk Covariance Matrix (DOASD)')
-plt.colorbar()
+plt.colorbar(mesh)
 
 plt.show()
 
 import numpy as np
 import matplotlib.pyplot as plt
+from matplotlib.colors import Normalize
 from sklearn.covariance import LedoitWolf, OAS, ShrunkCovariance
 
-class DOASD:
-    def __init__(self, diagonal_shrinkage=0.5, off_diagonal_shrinkage=0.1):
-        self.diagonal_shrinkage = diagonal_shrinkage
-        self.off_diagonal_shrinkage = off_diagonal_shrinkage
-
-    def fit(self, X):
-        emp_cov = np.cov(X, rowvar=False)
-        n_features = emp_cov.shape[0]
-
-        # Compute shrinkage factors
-        diag_shrinkage = self.diagonal_shrinkage
-        off_diag_shrinkage = self.off_diagonal_shrinkage
-
-        # Apply adaptive shrinkage
-        shrunk_diag_cov = emp_cov * (1 - diag_shrinkage) + np.diag(np.diag(emp_cov)) * diag_shrinkage
-        shrunk_cov = shrunk_diag_cov * (1 - off_diag_shrinkage) + np.diag(np.diag(shrunk_diag_cov)) * off_diag_shrinkage
-
-        self.covariance_ = shrunk_cov
-        return self
-
 # Parameters
 n_features = 40
 n_samples = 1000
@@ -569,90 +582,72 @@ oasd_estimator.fit(X_train)
 oas_estimator.fit(X_train)
 lw_estimator.fit(X_train)
 
-# Plot original covariance matrix
-plt.figure(figsize=(15, 5))
-plt.subplot(1, 4, 1)
-plt.imshow(np.cov(X_train, rowvar=False), cmap='hot', interpolation='nearest')
-plt.title('Original Covariance Matrix')
-plt.colorbar()
-
-# Plot shrunk covariance matrices
-plt.subplot(1, 4, 2)
-plt.imshow(doasd_estimator.covariance_, cmap='hot', interpolation='nearest')
-plt.title('DOASD')
-plt.colorbar()
-
-plt.subplot(1, 4, 3)
-plt.imshow(oasd_estimator.covariance_, cmap='hot', interpolation='nearest')
-plt.title('OASD')
-plt.colorbar()
-
-plt.subplot(1, 4, 4)
-plt.imshow(lw_estimator.covariance_, cmap='hot', interpolation='nearest')
-plt.title('Ledoit-Wolf')
-plt.colorbar()
+# Plot the original and shrunk covariance matrices on a single figure with a
+# shared color scale and one colorbar
+covariances = [('Original Covariance Matrix', fast_cov(X_train)),
+               ('DOASD', doasd_estimator.covariance_),
+               ('OASD', oasd_estimator.covariance_),
+               ('Ledoit-Wolf', lw_estimator.covariance_)]
+norm = Normalize(vmin=min(cov.min() for _, cov in covariances),
+                 vmax=max(cov.max() for _, cov in covariances))
+fig, axes = plt.subplots(1, 4, figsize=(15, 5), constrained_layout=True)
+for ax, (title, cov) in zip(axes, covariances):
+    mesh = plot_covariance(ax, cov, cmap='hot', norm=norm)
+    ax.set_title(title)
+fig.colorbar(mesh, ax=axes.ravel().tolist(), shrink=0.8)
 
 plt.show()
 
+import copy
+
 import numpy as np
 import matplotlib.pyplot as plt
+from joblib import Parallel, delayed
+from threadpoolctl import threadpool_limits
 from sklearn.covariance import LedoitWolf, OAS, ShrunkCovariance
-from sklearn.metrics import mean_squared_error
 
 # Parameters
 n_features = 40  # Number of features
 sample_sizes = np.arange(6, 30)  # Sample sizes from 6 to 30
 
-# Define a function to generate sample data with different variable scales
-def generate_data(n_samples, n_features):
-    base_X_train = np.random.normal(size=(n_samples, n_features))
-    scaling_factors = np.arange(1, n_features + 1)
-    X_train = base_X_train * scaling_factors
-    return X_train
-
 # Define a function to compute RMSE for a given estimator and sample size
 def compute_rmse(estimator, X_train):
-    true_cov = np.cov(X_train, rowvar=False)
+    true_cov = fast_cov(X_train)
     estimator.fit(X_train)
     estimated_cov = estimator.covariance_
-    return np.sqrt(mean_squared_error(true_cov.ravel(), estimated_cov.ravel()))
-
-# Define the DOASD estimator class with different levels of shrinkage
-class DOASD(ShrunkCovariance):
-    def __init__(self, diagonal_shrinkage=0.5, off_diagonal_shrinkage=0.1):
-        super().__init__()
-        self.diagonal_shrinkage = diagonal_shrinkage
-        self.off_diagonal_shrinkage = off_diagonal_shrinkage
-
-    def _compute_covariance(self, X):
-        # Calculate the empirical covariance of X
-        emp_cov = np.cov(X, rowvar=False)
-        return emp_cov
-
-    def fit(self, X, y=None):
-        emp_cov = self._compute_covariance(X)
-        n_features = emp_cov.shape[0]
-
-        # Compute shrinkage factors
-        diag_shrinkage = self.diagonal_shrinkage
-        off_diag_shrinkage = self.off_diagonal_shrinkage
-
-        # Apply shrinkage
-        shrunk_diag_cov = emp_cov * (1 - diag_shrinkage) + np.diag(np.diag(emp_cov)) * diag_shrinkage
-        shrunk_cov = shrunk_diag_cov * (1 - off_diag_shrinkage) + np.diag(np.diag(shrunk_diag_cov)) * off_diag_shrinkage
-
-        self.covariance_ = shrunk_cov
-        return self
-
-# Fit covariance estimators for different sample sizes and compute RMSE
+    return matrix_rmse(true_cov, estimated_cov)
+
+# Draw the largest sample once from a seeded generator; each sample size uses
+# a leading slice of it
+rng = np.random.default_rng(42)
+X_full = generate_data(sample_sizes.max(), n_features, rng)
+
+# Covariance estimators to compare; they hold no state between fits, so they
+# are built once and refit for every sample size
+estimators = [('Ledoit-Wolf', LedoitWolf()),
+              ('OAS', OAS()),
+              ('OASD', ShrunkCovariance(shrinkage=0.5)),
+              ('DOASD', DOASD(diagonal_shrinkage=0.5, off_diagonal_shrinkage=0.1))]
+
+# Fit covariance estimators for a single sample size and compute their RMSE.
+# The worker threads share the estimator list, so each fit goes to a shallow
+# copy and no thread reads another thread's covariance_
+def compute_sample_size_rmse(n_samples):
+    X_train = X_full[:n_samples]
+    return [(estimator_name, compute_rmse(copy.copy(estimator), X_train))
+            for estimator_name, estimator in estimators]
+
+# Fit covariance estimators for different sample sizes and compute RMSE; the
+# sample sizes are independent, so they run in parallel threads. A 40x40 BLAS
+# call is too small to amortize BLAS thread dispatch, so BLAS is kept
+# single-threaded for the whole sweep and the parallelism comes from the
+# sample-size loop
 rmse_results = {'Ledoit-Wolf': [], 'OAS': [], 'OASD': [], 'DOASD': []}
-for n_samples in sample_sizes:
-    X_train = generate_data(n_samples, n_features)
-    for estimator_name, estimator in [('Ledoit-Wolf', LedoitWolf()),
-                                      ('OAS', OAS()),
-                                      ('OASD', ShrunkCovariance(shrinkage=0.5)),
-                                      ('DOASD', DOASD(diagonal_shrinkage=0.5, off_diagonal_shrinkage=0.1))]:
-        rmse = compute_rmse(estimator, X_train)
+with threadpool_limits(limits=1, user_api='blas'):
+    sample_size_rmses = Parallel(n_jobs=-1, prefer='threads')(
+        delayed(compute_sample_size_rmse)(n_samples) for n_samples in sample_sizes)
+for rmses in sample_size_rmses:
+    for estimator_name, rmse in rmses:
         rmse_results[estimator_name].append(rmse)
 
 # Print RMSE values for each estimator across sample sizes